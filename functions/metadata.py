@@ -1,13 +1,89 @@
 import base64
+import binascii
+import functools
+import hashlib
 import io
 import json
+import operator
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from pypdf import PdfReader
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Parsed results keyed by a digest of the PDF bytes; survives across
+# invocations while the function container stays warm.
+_RESULT_CACHE: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+_RESULT_CACHE_SIZE = 128
+
+# Largest decoded PDF accepted; checked against the base64 length before
+# decoding so oversized uploads never reach pypdf.
+_MAX_PDF_BYTES = 50 * 1024 * 1024
+_TOO_LARGE_ERROR = f"PDF exceeds the {_MAX_PDF_BYTES // (1024 * 1024)} MiB limit"
+
+# A batch holds every decoded PDF in memory at once, so cap both the file
+# count and the combined decoded size.
+_MAX_BATCH_FILES = 32
+_BATCH_TOO_LARGE_ERROR = (
+    f"Batch exceeds {_MAX_BATCH_FILES} files or "
+    f"{_MAX_PDF_BYTES // (1024 * 1024)} MiB in total"
+)
+
+# Multiple of 4 so each slice of unbroken base64 ends on a quantum boundary.
+_B64_CHUNK = 64 * 1024
+
+# Worker pool for batch requests, created on first use and dropped if a
+# worker dies. _EXECUTOR_UNAVAILABLE records that creation failed (e.g. AWS
+# Lambda has no /dev/shm) so later batches go straight to serial parsing.
+_EXECUTOR: Optional[Executor] = None
+_EXECUTOR_UNAVAILABLE = False
+
+# PDF date string after the "D:" prefix: YYYYMMDDHHmmSSOHH'mm'. Year, month
+# and day are required; the time and offset parts are optional.
+_PDF_DATE_RE = re.compile(
+    r"(\d{4})(\d{2})(\d{2})(\d{2})?(\d{2})?(\d{2})?"
+    r"(?:([+\-Z])(\d{2})?'?(\d{2})?'?)?"
+)
+_IST = timezone(timedelta(hours=5, minutes=30))
+
+_INFO_FIELDS = (
+    ("Title", "/Title"),
+    ("Author", "/Author"),
+    ("Subject", "/Subject"),
+    ("Keywords", "/Keywords"),
+    ("Creator", "/Creator"),
+    ("Producer", "/Producer"),
+    ("CreationDate (IST)", "/CreationDate"),
+    ("ModDate (IST)", "/ModDate"),
+    ("Trapped", "/Trapped"),
+)
+_DATE_LABELS = ("CreationDate (IST)", "ModDate (IST)")
+
+_XMP_FIELDS = (
+    ("Title (XMP)", "dc_title"),
+    ("Creator (XMP)", "dc_creator"),
+    ("Description (XMP)", "dc_description"),
+    ("Keywords (XMP)", "pdf_keywords"),
+    ("CreatorTool (XMP)", "xmp_creator_tool"),
+    ("CreateDate (XMP)", "xmp_create_date"),
+    ("ModifyDate (XMP)", "xmp_modify_date"),
+    ("Producer (XMP)", "pdf_producer"),
+)
+_XMP_GETTER = operator.attrgetter(*(attr for _, attr in _XMP_FIELDS))
+
 
 def _to_str(value: Any) -> str:
+    if type(value) is str:
+        return value
     if value is None:
         return ""
     if isinstance(value, bytes):
@@ -18,95 +94,272 @@ def _to_str(value: Any) -> str:
     return str(value)
 
 
+def _b64decode(data: str) -> bytes:
+    """Decode base64 in fixed-size slices to bound peak memory.
+
+    base64.b64decode first copies the whole string into an ASCII bytes
+    object; decoding slice by slice into a BytesIO skips that copy, and
+    getvalue() hands back the buffer without copying it again.
+    """
+    out = io.BytesIO()
+    try:
+        for start in range(0, len(data), _B64_CHUNK):
+            out.write(binascii.a2b_base64(data[start:start + _B64_CHUNK]))
+    except (binascii.Error, ValueError):
+        # Embedded line breaks shift slices off quantum boundaries.
+        return base64.b64decode(data)
+    return out.getvalue()
+
+
 def _extract_xmp_xml(xmp: Any) -> Optional[str]:
-    if not xmp:
+    # The /Metadata stream is the XMP packet itself, so return its decoded
+    # bytes rather than probing pypdf's parsed object for a serialiser.
+    if xmp is None:
+        return None
+    try:
+        return _to_str(xmp.stream.get_data())
+    except Exception:
         return None
-    for attr in ("get_xml", "xml", "xmpmeta"):
-        candidate = getattr(xmp, attr, None)
-        if callable(candidate):
-            try:
-                xml = candidate()
-                return _to_str(xml)
-            except Exception:
-                continue
-        if candidate is not None:
-            return _to_str(candidate)
-    return None
 
 
-def _build_parsed_fields(info: Dict[str, str], xmp: Any) -> Dict[str, str]:
-    def to_ist(date_str: str) -> str:
-        if not date_str:
-            return ""
-        if date_str.startswith("D:"):
-            date_str = date_str[2:]
-        # Basic PDF date parser: YYYYMMDDHHmmSSOHH'mm'
-        def _digits(s: str, n: int) -> Optional[int]:
-            if len(s) < n or not s[:n].isdigit():
-                return None
-            return int(s[:n])
-
-        y = _digits(date_str, 4)
-        mo = _digits(date_str[4:], 2) if y is not None else None
-        d = _digits(date_str[6:], 2) if mo is not None else None
-        hh = _digits(date_str[8:], 2) if d is not None else 0
-        mm = _digits(date_str[10:], 2) if d is not None else 0
-        ss = _digits(date_str[12:], 2) if d is not None else 0
-        if y is None or mo is None or d is None:
-            return _to_str(date_str)
-
-        tz = timezone.utc
-        tz_part = date_str[14:]
-        if tz_part:
-            sign = tz_part[0]
-            if sign in ("+", "-"):
-                try:
-                    tzh = int(tz_part[1:3])
-                    tzm = int(tz_part[4:6]) if len(tz_part) >= 6 else 0
-                    offset = timedelta(hours=tzh, minutes=tzm)
-                    if sign == "-":
-                        offset = -offset
-                    tz = timezone(offset)
-                except Exception:
-                    tz = timezone.utc
+@functools.lru_cache(maxsize=4096)
+def _to_ist(date_str: str) -> str:
+    if not date_str:
+        return ""
+    if date_str.startswith("D:"):
+        date_str = date_str[2:]
+    m = _PDF_DATE_RE.match(date_str)
+    if m is None:
+        return _to_str(date_str)
+    y, mo, d, hh, mm, ss, sign, tzh, tzm = m.groups()
+
+    tz = timezone.utc
+    if sign in ("+", "-") and tzh:
         try:
-            dt = datetime(y, mo, d, hh, mm, ss, tzinfo=tz)
+            offset = timedelta(hours=int(tzh), minutes=int(tzm or 0))
+            tz = timezone(-offset if sign == "-" else offset)
         except Exception:
-            return _to_str(date_str)
-        ist = timezone(timedelta(hours=5, minutes=30))
-        return dt.astimezone(ist).strftime("%Y-%m-%d %H:%M:%S %Z")
-
-    fields = {
-        "Title": info.get("/Title", ""),
-        "Author": info.get("/Author", ""),
-        "Subject": info.get("/Subject", ""),
-        "Keywords": info.get("/Keywords", ""),
-        "Creator": info.get("/Creator", ""),
-        "Producer": info.get("/Producer", ""),
-        "CreationDate (IST)": to_ist(info.get("/CreationDate", "")),
-        "ModDate (IST)": to_ist(info.get("/ModDate", "")),
-        "Trapped": info.get("/Trapped", ""),
-    }
+            tz = timezone.utc
+    try:
+        dt = datetime(
+            int(y), int(mo), int(d),
+            int(hh or 0), int(mm or 0), int(ss or 0),
+            tzinfo=tz,
+        )
+    except Exception:
+        return _to_str(date_str)
+    return dt.astimezone(_IST).strftime("%Y-%m-%d %H:%M:%S %Z")
+
+
+def _build_parsed_fields(info: Dict[str, str], xmp: Any) -> Dict[str, str]:
+    fields = {label: info.get(key, "") for label, key in _INFO_FIELDS}
+    for label in _DATE_LABELS:
+        fields[label] = _to_ist(fields[label])
 
     if xmp:
-        xmp_map = {
-            "Title (XMP)": "dc_title",
-            "Creator (XMP)": "dc_creator",
-            "Description (XMP)": "dc_description",
-            "Keywords (XMP)": "pdf_keywords",
-            "CreatorTool (XMP)": "xmp_creatortool",
-            "CreateDate (XMP)": "xmp_create_date",
-            "ModifyDate (XMP)": "xmp_modify_date",
-            "Producer (XMP)": "pdf_producer",
-        }
-        for label, attr in xmp_map.items():
-            val = getattr(xmp, attr, None)
+        try:
+            values = _XMP_GETTER(xmp)
+        except AttributeError:
+            values = tuple(getattr(xmp, attr, None) for _, attr in _XMP_FIELDS)
+        for (label, _), val in zip(_XMP_FIELDS, values):
             if val is not None:
                 fields[label] = _to_str(val)
 
     return fields
 
 
+def _load_metadata(pdf_bytes: bytes) -> Tuple[Any, Any, int]:
+    """Resolve only the Info dict, XMP stream and page count of a PDF.
+
+    PdfReader reads just the trailer and xref table up front and resolves
+    everything else on demand, so touching /Info, /Root/Metadata and
+    /Root/Pages/Count leaves content streams and the page tree unparsed.
+    """
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    info = reader.metadata or {}
+    try:
+        has_xmp = "/Metadata" in reader.trailer["/Root"]
+    except Exception:
+        has_xmp = True
+    xmp = reader.xmp_metadata if has_xmp else None
+    return info, xmp, _page_count(reader)
+
+
+def _page_count(reader: PdfReader) -> int:
+    # /Root/Pages/Count is a single dict fetch; len(reader.pages) walks
+    # every /Kids node, so only use it when the count is missing or bogus.
+    try:
+        count = reader.trailer["/Root"]["/Pages"]["/Count"]
+        if isinstance(count, int) and count >= 0:
+            return int(count)
+    except Exception:
+        pass
+    return len(reader.pages)
+
+
+def _digest(pdf_bytes: bytes) -> bytes:
+    return hashlib.blake2b(pdf_bytes, digest_size=16).digest()
+
+
+def _cache_get(key: bytes) -> Optional[Dict[str, Any]]:
+    cached = _RESULT_CACHE.get(key)
+    if cached is not None:
+        _RESULT_CACHE.move_to_end(key)
+    return cached
+
+
+def _cache_put(key: bytes, result: Dict[str, Any]) -> None:
+    _RESULT_CACHE[key] = result
+    if len(_RESULT_CACHE) > _RESULT_CACHE_SIZE:
+        _RESULT_CACHE.popitem(last=False)
+
+
+def _parse(pdf_bytes: bytes) -> Dict[str, Any]:
+    info, xmp, page_count = _load_metadata(pdf_bytes)
+    # Keys are NameObjects and become plain str so the cache, worker pickles
+    # and serialiser only ever see builtin keys. Values are mostly
+    # TextStringObjects (str subclasses) that need no conversion.
+    info_dict = {
+        str(k): v if isinstance(v, str) else _to_str(v)
+        for k, v in info.items()
+    }
+    return {
+        "size_bytes": len(pdf_bytes),
+        "page_count": page_count,
+        "parsed": _build_parsed_fields(info_dict, xmp),
+        "raw_info": info_dict,
+        "xmp_xml": _extract_xmp_xml(xmp),
+    }
+
+
+def _decoded_size(file_b64: str) -> int:
+    return len(file_b64) * 3 // 4
+
+
+def _too_large(file_b64: str) -> bool:
+    return _decoded_size(file_b64) > _MAX_PDF_BYTES
+
+
+def _batch_too_large(files: List[Dict[str, Any]]) -> bool:
+    if len(files) > _MAX_BATCH_FILES:
+        return True
+    total = sum(
+        _decoded_size(item["file_base64"])
+        for item in files
+        if isinstance(item.get("file_base64"), str)
+    )
+    return total > _MAX_PDF_BYTES
+
+
+def _extract(pdf_bytes: bytes) -> Dict[str, Any]:
+    key = _digest(pdf_bytes)
+    result = _cache_get(key)
+    if result is None:
+        result = _parse(pdf_bytes)
+        _cache_put(key, result)
+    return result
+
+
+def _batch_executor() -> Optional[Executor]:
+    global _EXECUTOR, _EXECUTOR_UNAVAILABLE
+    if _EXECUTOR is None and not _EXECUTOR_UNAVAILABLE:
+        try:
+            _EXECUTOR = ProcessPoolExecutor(max_workers=os.cpu_count())
+        except (OSError, NotImplementedError):
+            _EXECUTOR_UNAVAILABLE = True
+    return _EXECUTOR
+
+
+def _discard_executor() -> None:
+    global _EXECUTOR
+    if _EXECUTOR is not None:
+        _EXECUTOR.shutdown(wait=False)
+        _EXECUTOR = None
+
+
+def _extract_batch(files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Extract metadata for several uploads, parsing cache misses in parallel.
+
+    Results keep the order of ``files``; a file that fails to decode or
+    parse gets an ``error`` entry instead of failing the whole batch.
+    """
+    results = [{"filename": item.get("filename") or "upload.pdf"} for item in files]
+    misses = []
+    for index, item in enumerate(files):
+        file_b64 = item.get("file_base64")
+        if not file_b64:
+            results[index]["error"] = "Missing file_base64"
+            continue
+        try:
+            if _too_large(file_b64):
+                results[index]["error"] = _TOO_LARGE_ERROR
+                continue
+            pdf_bytes = _b64decode(file_b64)
+            key = _digest(pdf_bytes)
+            cached = _cache_get(key)
+            if cached is not None:
+                results[index].update(cached)
+            else:
+                misses.append((index, key, pdf_bytes))
+        except Exception as exc:
+            results[index]["error"] = f"Failed to read PDF metadata: {exc}"
+
+    # Misses the pool could not handle (unavailable or broken) are parsed here.
+    serial = misses
+    executor = _batch_executor() if misses else None
+    if executor is not None:
+        serial = []
+        futures = {}
+        broken = False
+        for miss in misses:
+            if broken:
+                serial.append(miss)
+                continue
+            try:
+                futures[executor.submit(_parse, miss[2])] = miss
+            except BrokenProcessPool:
+                broken = True
+                serial.append(miss)
+        for future in as_completed(futures):
+            index, key, pdf_bytes = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                broken = True
+                serial.append((index, key, pdf_bytes))
+                continue
+            except Exception as exc:
+                results[index]["error"] = f"Failed to read PDF metadata: {exc}"
+                continue
+            _cache_put(key, result)
+            results[index].update(result)
+        if broken:
+            _discard_executor()
+
+    for index, key, pdf_bytes in serial:
+        try:
+            result = _parse(pdf_bytes)
+        except Exception as exc:
+            results[index]["error"] = f"Failed to read PDF metadata: {exc}"
+            continue
+        _cache_put(key, result)
+        results[index].update(result)
+    return results
+
+
+def _dumps(body: Dict[str, Any]) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(body).decode("utf-8")
+        except orjson.JSONEncodeError:
+            # orjson rejects lone surrogates (from a malformed UTF-16 Info
+            # string), which json.dumps escapes, and any dict key that is
+            # not exactly str; _parse emits plain str keys so results never
+            # hit the latter.
+            pass
+    return json.dumps(body)
+
+
 def _response(status: int, body: Dict[str, Any]):
     return {
         "statusCode": status,
@@ -116,7 +369,7 @@ def _response(status: int, body: Dict[str, Any]):
             "Access-Control-Allow-Headers": "Content-Type",
             "Access-Control-Allow-Methods": "POST, OPTIONS",
         },
-        "body": json.dumps(body),
+        "body": _dumps(body),
     }
 
 
@@ -130,30 +383,29 @@ def handler(event, context):
     try:
         raw_body = event.get("body") or ""
         if event.get("isBase64Encoded"):
-            raw_body = base64.b64decode(raw_body).decode("utf-8", errors="replace")
+            raw_body = _b64decode(raw_body).decode("utf-8", errors="replace")
         payload = json.loads(raw_body)
     except Exception:
         return _response(400, {"error": "Invalid JSON body"})
 
+    files = payload.get("files")
+    if files is not None:
+        if not isinstance(files, list) or not all(isinstance(f, dict) for f in files):
+            return _response(400, {"error": "files must be a list of objects"})
+        if _batch_too_large(files):
+            return _response(413, {"error": _BATCH_TOO_LARGE_ERROR})
+        return _response(200, {"ok": True, "results": _extract_batch(files)})
+
     file_b64 = payload.get("file_base64")
     filename = payload.get("filename") or "upload.pdf"
     if not file_b64:
         return _response(400, {"error": "Missing file_base64"})
 
     try:
-        pdf_bytes = base64.b64decode(file_b64)
-        reader = PdfReader(io.BytesIO(pdf_bytes))
-        info = reader.metadata or {}
-        info_dict = {_to_str(k): _to_str(v) for k, v in info.items()}
-        xmp = reader.xmp_metadata
-        result = {
-            "filename": filename,
-            "size_bytes": len(pdf_bytes),
-            "page_count": len(reader.pages),
-            "parsed": _build_parsed_fields(info_dict, xmp),
-            "raw_info": info_dict,
-            "xmp_xml": _extract_xmp_xml(xmp),
-        }
+        if _too_large(file_b64):
+            return _response(413, {"error": _TOO_LARGE_ERROR})
+        pdf_bytes = _b64decode(file_b64)
+        result = {"filename": filename, **_extract(pdf_bytes)}
         return _response(200, {"ok": True, "result": result})
     except Exception as exc:
         return _response(400, {"error": f"Failed to read PDF metadata: {exc}"})
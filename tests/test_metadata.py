@@ -0,0 +1,297 @@
+import base64
+import io
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import NameObject, NumberObject, TextStringObject
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "functions"))
+
+import metadata  # noqa: E402
+
+XMP_PACKET = (
+    b'<?xpacket begin=""?><x:xmpmeta xmlns:x="adobe:ns:meta/">'
+    b'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+    b'<rdf:Description xmlns:xmp="http://ns.adobe.com/xap/1.0/" xmp:CreatorTool="Tool"/>'
+    b'</rdf:RDF></x:xmpmeta><?xpacket end="w"?>'
+)
+
+FULL_XMP = (
+    b'<?xpacket begin=""?><x:xmpmeta xmlns:x="adobe:ns:meta/">'
+    b'<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+    b'<rdf:Description rdf:about=""'
+    b' xmlns:dc="http://purl.org/dc/elements/1.1/"'
+    b' xmlns:xmp="http://ns.adobe.com/xap/1.0/"'
+    b' xmlns:pdf="http://ns.adobe.com/pdf/1.3/"'
+    b' xmp:CreatorTool="Tool" xmp:CreateDate="2024-01-02T03:04:05Z"'
+    b' xmp:ModifyDate="2024-01-03T03:04:05Z" pdf:Producer="Prod" pdf:Keywords="a, b">'
+    b'<dc:title><rdf:Alt><rdf:li xml:lang="x-default">XT</rdf:li></rdf:Alt></dc:title>'
+    b'<dc:creator><rdf:Seq><rdf:li>Ann</rdf:li></rdf:Seq></dc:creator>'
+    b'<dc:description><rdf:Alt><rdf:li xml:lang="x-default">Desc</rdf:li></rdf:Alt></dc:description>'
+    b'</rdf:Description></rdf:RDF></x:xmpmeta><?xpacket end="w"?>'
+)
+
+
+def make_pdf(pages=3, title="Hello", xmp=None):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(100, 100)
+    writer.add_metadata({
+        "/Title": title,
+        "/CreationDate": "D:20240102030405+05'30'",
+        "/ModDate": "D:20240102",
+    })
+    if xmp is not None:
+        writer.xmp_metadata = xmp
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def with_page_count(count, pages=3):
+    """Build a PDF whose /Pages /Count is replaced, or removed if None."""
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(100, 100)
+    pages_dict = writer.root_object["/Pages"]
+    if count is None:
+        del pages_dict[NameObject("/Count")]
+    else:
+        pages_dict[NameObject("/Count")] = count
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def null_info(pdf):
+    # The writer's only "/Info <ref>" entry is in the trailer, after the
+    # xref table, so rewriting it leaves every byte offset intact.
+    head, sep, tail = pdf.rpartition(b"/Info ")
+    return head + sep + b"null" + tail[tail.index(b"\n"):]
+
+
+def b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def post(payload):
+    response = metadata.handler({"httpMethod": "POST", "body": json.dumps(payload)}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    metadata._RESULT_CACHE.clear()
+    yield
+    metadata._RESULT_CACHE.clear()
+
+
+@pytest.fixture
+def no_pool(monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise OSError(38, "Function not implemented")
+
+    monkeypatch.setattr(metadata, "ProcessPoolExecutor", unavailable)
+    monkeypatch.setattr(metadata, "_EXECUTOR", None)
+    monkeypatch.setattr(metadata, "_EXECUTOR_UNAVAILABLE", False)
+
+
+def test_single_upload():
+    status, body = post({"filename": "a.pdf", "file_base64": b64(make_pdf(xmp=XMP_PACKET))})
+    assert status == 200
+    result = body["result"]
+    assert result["filename"] == "a.pdf"
+    assert result["size_bytes"] > 0
+    assert result["page_count"] == 3
+    assert result["parsed"]["Title"] == "Hello"
+    assert result["raw_info"]["/Title"] == "Hello"
+    assert result["xmp_xml"] == XMP_PACKET.decode("utf-8")
+
+
+def test_missing_and_invalid_input():
+    assert post({})[0] == 400
+    status, body = post({"file_base64": b64(b"not a pdf")})
+    assert status == 400
+    assert body["error"].startswith("Failed to read PDF metadata")
+
+
+def test_null_info_dictionary():
+    status, body = post({"file_base64": b64(null_info(make_pdf()))})
+    assert status == 200
+    assert body["result"]["raw_info"] == {}
+    assert body["result"]["parsed"]["Title"] == ""
+    assert body["result"]["page_count"] == 3
+
+
+def test_cache_hit_keeps_per_request_filename():
+    pdf = b64(make_pdf())
+    post({"filename": "a.pdf", "file_base64": pdf})
+    _, body = post({"filename": "b.pdf", "file_base64": pdf})
+    assert body["result"]["filename"] == "b.pdf"
+    assert len(metadata._RESULT_CACHE) == 1
+
+
+def test_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(metadata, "_RESULT_CACHE_SIZE", 2)
+    pdfs = [make_pdf(title=str(i)) for i in range(3)]
+    metadata._extract(pdfs[0])
+    metadata._extract(pdfs[1])
+    metadata._extract(pdfs[0])
+    metadata._extract(pdfs[2])
+    assert list(metadata._RESULT_CACHE) == [
+        metadata._digest(pdfs[0]),
+        metadata._digest(pdfs[2]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("", ""),
+        ("D:20240102030405+05'30'", "2024-01-02 03:04:05 UTC+05:30"),
+        ("D:20240102030405Z", "2024-01-02 08:34:05 UTC+05:30"),
+        ("D:20240102", "2024-01-02 05:30:00 UTC+05:30"),
+        ("D:20240101000000+99'00'", "2024-01-01 05:30:00 UTC+05:30"),
+        ("D:2024", "2024"),
+        ("D:20241399", "20241399"),
+    ],
+)
+def test_to_ist(value, expected):
+    assert metadata._to_ist(value) == expected
+
+
+def test_raw_info_keys_are_plain_str():
+    result = metadata._extract(make_pdf())
+    assert result["raw_info"]
+    assert all(type(k) is str for k in result["raw_info"])
+
+
+@pytest.mark.parametrize(
+    "count, expected",
+    [
+        (NumberObject(3), 3),
+        (NumberObject(7), 7),
+        (None, 3),
+        (NumberObject(-1), 3),
+        (TextStringObject("three"), 3),
+    ],
+)
+def test_page_count_reads_count_and_falls_back_to_page_tree(count, expected):
+    status, body = post({"file_base64": b64(with_page_count(count))})
+    assert status == 200
+    assert body["result"]["page_count"] == expected
+
+
+def test_oversized_upload_is_rejected_before_decoding(monkeypatch):
+    monkeypatch.setattr(metadata, "_MAX_PDF_BYTES", 16)
+    monkeypatch.setattr(metadata, "_b64decode", None)
+    status, body = post({"file_base64": b64(make_pdf())})
+    assert status == 413
+    assert "error" in body
+
+
+def test_b64decode_across_slices_and_line_breaks():
+    data = os.urandom(3 * metadata._B64_CHUNK // 2)
+    assert metadata._b64decode(base64.b64encode(data).decode("ascii")) == data
+    assert metadata._b64decode(base64.encodebytes(data).decode("ascii")) == data
+
+
+def test_b64decode_rejects_invalid_input():
+    with pytest.raises(ValueError):
+        metadata._b64decode("A")
+
+
+def test_all_xmp_fields_are_parsed():
+    _, body = post({"file_base64": b64(make_pdf(xmp=FULL_XMP))})
+    parsed = body["result"]["parsed"]
+    assert {label: parsed[label] for label, _ in metadata._XMP_FIELDS} == {
+        "Title (XMP)": "{'x-default': 'XT'}",
+        "Creator (XMP)": "['Ann']",
+        "Description (XMP)": "{'x-default': 'Desc'}",
+        "Keywords (XMP)": "a, b",
+        "CreatorTool (XMP)": "Tool",
+        "CreateDate (XMP)": "2024-01-02 03:04:05",
+        "ModifyDate (XMP)": "2024-01-03 03:04:05",
+        "Producer (XMP)": "Prod",
+    }
+
+
+def test_xmp_fields_fall_back_when_attributes_are_missing():
+    xmp = SimpleNamespace(dc_title="T", xmp_creator_tool="Tool")
+    fields = metadata._build_parsed_fields({}, xmp)
+    assert fields["Title (XMP)"] == "T"
+    assert fields["CreatorTool (XMP)"] == "Tool"
+    assert "Producer (XMP)" not in fields
+
+
+def test_orjson_serialises_real_results(monkeypatch):
+    pytest.importorskip("orjson")
+    event = {
+        "httpMethod": "POST",
+        "body": json.dumps({"file_base64": b64(make_pdf(xmp=FULL_XMP))}),
+    }
+
+    def no_fallback(*args, **kwargs):
+        raise AssertionError("json.dumps fallback used")
+
+    monkeypatch.setattr(metadata.json, "dumps", no_fallback)
+    response = metadata.handler(event, None)
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["result"]["raw_info"]["/Title"] == "Hello"
+    assert body["result"]["parsed"]["Producer (XMP)"] == "Prod"
+
+
+def test_dumps_falls_back_on_lone_surrogates():
+    assert json.loads(metadata._dumps({"v": "\ud800"})) == {"v": "\ud800"}
+
+
+def test_missing_xmp_skips_xmp_parsing(monkeypatch):
+    def untouched(reader):
+        raise AssertionError("xmp_metadata read without /Metadata")
+
+    monkeypatch.setattr(metadata.PdfReader, "xmp_metadata", property(untouched))
+    status, body = post({"file_base64": b64(null_info(make_pdf()))})
+    assert status == 200
+    result = body["result"]
+    assert result["xmp_xml"] is None
+    assert result["raw_info"] == {}
+    assert not any(label in result["parsed"] for label, _ in metadata._XMP_FIELDS)
+
+
+def _batch_summary(body):
+    return [(r["filename"], r.get("page_count"), "error" in r) for r in body["results"]]
+
+
+def test_batch_keeps_order_and_reports_per_file_errors():
+    files = [{"filename": f"{i}.pdf", "file_base64": b64(make_pdf(pages=i + 1))} for i in range(3)]
+    files.insert(1, {"filename": "bad.pdf", "file_base64": b64(b"not a pdf")})
+    files.append({"filename": "empty.pdf"})
+    status, body = post({"files": files})
+    assert status == 200
+    assert _batch_summary(body) == [
+        ("0.pdf", 1, False),
+        ("bad.pdf", None, True),
+        ("1.pdf", 2, False),
+        ("2.pdf", 3, False),
+        ("empty.pdf", None, True),
+    ]
+
+
+def test_batch_parses_serially_without_a_pool(no_pool):
+    files = [{"filename": f"{i}.pdf", "file_base64": b64(make_pdf(pages=i + 1))} for i in range(2)]
+    status, body = post({"files": files})
+    assert status == 200
+    assert _batch_summary(body) == [("0.pdf", 1, False), ("1.pdf", 2, False)]
+    assert metadata._EXECUTOR_UNAVAILABLE
+
+
+def test_batch_rejects_bad_shapes_and_limits(monkeypatch):
+    assert post({"files": "nope"})[0] == 400
+    assert post({"files": [{"file_base64": "AAAA"}] * (metadata._MAX_BATCH_FILES + 1)})[0] == 413
+    monkeypatch.setattr(metadata, "_MAX_PDF_BYTES", 4)
+    assert post({"files": [{"file_base64": "AAAA"}] * 2})[0] == 413